@@ -0,0 +1 @@
+from .inline import render_inline, render_inline_many
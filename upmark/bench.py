@@ -0,0 +1,113 @@
+import argparse
+import html
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+from . import entity
+from .inline import render_inline, render_inline_many
+from .parser import Parser
+from .rule import DEFAULT_RULES
+
+INLINE_SAMPLES = [
+    "Release notes",
+    "meeting moved to 3pm",
+    "this is *really* important",
+    "__bold__ move",
+    "see the attached file",
+    "***all of it***",
+    "a plain table cell",
+    "snake_case_name",
+]
+
+
+def per_second(fn, items: [str]) -> float:
+    t0 = time.perf_counter()
+    fn(items)
+    return len(items) / (time.perf_counter() - t0)
+
+
+def bench_inline(n: int) -> dict[str, float]:
+    strings = [INLINE_SAMPLES[i % len(INLINE_SAMPLES)] for i in range(n)]
+    full = Parser(DEFAULT_RULES)
+    return {
+        "render_inline_many": per_second(render_inline_many, strings),
+        "render_inline": per_second(lambda ss: [render_inline(s) for s in ss], strings),
+        "Parser.parse": per_second(
+            lambda ss: [full.parse(s).to_string() for s in ss], strings
+        ),
+    }
+
+
+def _timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_escape(n: int) -> dict[str, float]:
+    test_md = (Path(__file__).parent.parent / "test.md").read_text()
+    sample = test_md + '\nif a < b && c > "d" then\n\nplain words <y> & "z"\n'
+    text = sample * max(n // 1000, 1)
+    parser = Parser(DEFAULT_RULES)
+    content = parser.parse(text)
+    size = len(text.encode("utf-8")) / 1e6
+    with mock.patch.object(entity, "escape", lambda s: s):
+        unescaped = _timed(content.to_string)
+        raw_html = content.to_string()
+    # escaping the whole output afterwards also mangles the tags; it's timed
+    # only to compare cost
+    escape_after = unescaped + _timed(lambda: html.escape(raw_html))
+    escape_during = _timed(content.to_string)
+    return {
+        "no escaping": size / unescaped,
+        "escape fragments": size / escape_during,
+        "escape output after": size / escape_after,
+    }
+
+
+def bench_lines(n: int) -> dict[str, float]:
+    test_md = (Path(__file__).parent.parent / "test.md").read_text()
+    words = "lorem ipsum dolor sit amet consectetur adipiscing elit".split()
+    prose = "\n".join(
+        " ".join(words[(i + j) % len(words)] for j in range(10))
+        + (f"\nSection {i}\n---" if i % 40 == 0 else "")
+        for i in range(n // 10)
+    )
+    documents = {"test.md": test_md * max(n // 1000, 1), "prose": prose + "\n"}
+    full = Parser(DEFAULT_RULES)
+    classified = Parser(DEFAULT_RULES, classify_lines=True)
+    rates = {}
+    for name, text in documents.items():
+        size = len(text.encode("utf-8")) / 1e6
+        rates[f"{name} full scan"] = size / _timed(lambda: full.parse(text))
+        rates[f"{name} classified"] = size / _timed(lambda: classified.parse(text))
+    return rates
+
+
+BENCHMARKS = {
+    "inline": (bench_inline, "strings/s"),
+    "escape": (bench_escape, "MB/s"),
+    "lines": (bench_lines, "MB/s"),
+}
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m upmark.bench", description="Run upmark micro-benchmarks."
+    )
+    arg_parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    arg_parser.add_argument("-n", type=int, default=200_000, help="items per run")
+    args = arg_parser.parse_args(argv)
+    bench, unit = BENCHMARKS[args.benchmark]
+    for name, rate in bench(args.n).items():
+        print(f"{name:<20} {rate:>14,.0f} {unit}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
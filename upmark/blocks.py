@@ -0,0 +1,108 @@
+import re
+from bisect import bisect_right
+
+from .entity import Content, Entity
+
+# two or more blank lines between non-blank text: only rules with
+# crosses_blank_lines match across one, and nothing matches the newlines alone
+CUT_PATTERN = re.compile(r"(?<=\S)\n{3,}(?=\S)")
+
+
+def find_cuts(parser, text: str) -> [int]:
+    # leave "\n\n" at the start of the next block for rules anchored on a
+    # blank line, and at least one "\n" for the previous block's trailer
+    cuts = [m.end() - 2 for m in CUT_PATTERN.finditer(text)]
+    crossing = [i for i, rule in enumerate(parser.blocks) if rule.crosses_blank_lines]
+    if cuts and crossing:
+        # run every rule up to the last one that can cross a cut, exactly as
+        # a full parse would, and keep only cuts outside what they matched
+        content = Content.raw_from_str(text)
+        for rule in parser.blocks[: crossing[-1] + 1]:
+            content = parser.apply_rule(text, rule, content)
+        spans = [(el.start, el.end) for el in content.content if not el.is_raw]
+        cuts = _outside(cuts, spans)
+    return cuts
+
+
+def _outside(cuts: [int], spans: [(int, int)]) -> [int]:
+    kept = []
+    ix = 0
+    for cut in cuts:
+        while ix < len(spans) and spans[ix][1] <= cut:
+            ix += 1
+        if ix < len(spans) and spans[ix][0] < cut:
+            continue
+        kept.append(cut)
+    return kept
+
+
+def _is_blank(el: Entity) -> bool:
+    return el.is_raw and el.to_string().isspace()
+
+
+class BlockIndex:
+    text: str
+    bounds: [int]
+    parsed: dict[int, Content]
+
+    def __init__(self, parser, text: str):
+        self.parser = parser
+        self.text = text
+        self.bounds = [0, *find_cuts(parser, text), len(text)]
+        self.parsed = {}
+
+    def __len__(self):
+        return len(self.bounds) - 1
+
+    def block_at(self, offset: int) -> int:
+        return min(max(bisect_right(self.bounds, offset) - 1, 0), len(self) - 1)
+
+    def content(self, block: int) -> Content:
+        if (content := self.parsed.get(block)) is None:
+            start, end = self.bounds[block], self.bounds[block + 1]
+            # the text's own ends aren't cuts: whitespace there is dropped,
+            # as in the full parse
+            edges = [cut for cut in (start, end) if 0 < cut < len(self.text)]
+            content = self.parser.parse_range(self.text, start, end, edges)
+            self.parsed[block] = content
+        return content
+
+    def _joined(self, block: int) -> bool:
+        # whether the full parse sees a single raw across the cut before
+        # `block` that isn't all whitespace, and so keeps it
+        if block <= 0 or block >= len(self):
+            return False
+        cut = self.bounds[block]
+        before = self.content(block - 1).content
+        after = self.content(block).content
+        return (
+            bool(before)
+            and before[-1].is_raw
+            and before[-1].end == cut
+            and not _is_blank(before[-1])
+        ) or (
+            bool(after)
+            and after[0].is_raw
+            and after[0].start == cut
+            and not _is_blank(after[0])
+        )
+
+    def render_block(self, block: int) -> str:
+        start, end = self.bounds[block], self.bounds[block + 1]
+        els = self.content(block).content
+        lo, hi = 0, len(els)
+        if lo < hi and els[0].start == start and _is_blank(els[0]):
+            if not self._joined(block):
+                lo += 1
+        if lo < hi and els[-1].end == end and _is_blank(els[-1]):
+            if not self._joined(block + 1):
+                hi -= 1
+        return "".join(el.to_string() for el in els[lo:hi])
+
+    def render_range(self, start_block: int, count: int) -> str:
+        stop = min(start_block + count, len(self))
+        return "".join(self.render_block(i) for i in range(max(start_block, 0), stop))
+
+    def render_offsets(self, start: int, end: int) -> str:
+        first = self.block_at(start)
+        return self.render_range(first, self.block_at(max(end - 1, start)) - first + 1)
@@ -0,0 +1,183 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .parser import Parser
+from .rule import DEFAULT_RULES, Rule
+
+MANIFEST_NAME = ".upmark-manifest.json"
+HASH_CHUNK_SIZE = 1 << 20
+SOURCE_DIR = Path(__file__).parent
+
+_parser = Parser(DEFAULT_RULES)
+
+
+def config_fingerprint(rules: [type[Rule]], source_dir: Path = SOURCE_DIR) -> str:
+    h = hashlib.sha256()
+    for r in rules:
+        h.update(r.__qualname__.encode())
+        h.update(b"\0")
+        h.update(r.pattern.pattern.encode())
+        h.update(b"\0")
+    # rendering can change without any pattern changing, so the package
+    # sources stand in for a renderer version
+    for src in sorted(source_dir.glob("*.py")):
+        h.update(src.name.encode())
+        h.update(b"\0")
+        h.update(src.read_bytes())
+    return h.hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def convert_file(src: Path, dst: Path) -> int:
+    text = src.read_text(encoding="utf-8")
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    # a failure part way through mustn't leave a truncated page behind
+    tmp = dst.with_name(dst.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for el in _parser.parse(text).content:
+                f.write(el.to_string())
+        os.replace(tmp, dst)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return len(text.encode("utf-8"))
+
+
+def _convert(job: (str, str)) -> (int, str | None):
+    src, dst = job
+    try:
+        return convert_file(Path(src), Path(dst)), None
+    except Exception as e:
+        # one bad file shouldn't cost the rest of the build its manifest
+        return 0, f"{type(e).__name__}: {e}"
+
+
+def load_manifest(path: Path) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build(
+    src_dir: Path, out_dir: Path, jobs: int | None = None, force: bool = False
+) -> dict:
+    t0 = time.perf_counter()
+    src_dir = Path(src_dir)
+    out_dir = Path(out_dir)
+    manifest_path = out_dir / MANIFEST_NAME
+    fingerprint = config_fingerprint(DEFAULT_RULES)
+    manifest = load_manifest(manifest_path)
+    built_files = manifest.get("files", {})
+    if force or manifest.get("config") != fingerprint:
+        old_files = {}
+    else:
+        old_files = built_files
+
+    new_files = {}
+    todo = []
+    todo_rels = []
+    skipped = 0
+    for src in sorted(src_dir.rglob("*.md")):
+        rel = src.relative_to(src_dir).as_posix()
+        dst = out_dir / Path(rel).with_suffix(".html")
+        st = src.stat()
+        old = old_files.get(rel)
+        if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            digest = old["sha256"]
+        else:
+            digest = hash_file(src)
+        new_files[rel] = {
+            "sha256": digest,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        if old and old["sha256"] == digest and dst.exists():
+            skipped += 1
+        else:
+            todo.append((str(src), str(dst)))
+            todo_rels.append(rel)
+
+    if jobs == 1 or len(todo) < 2:
+        results = [_convert(job) for job in todo]
+    else:
+        workers = jobs or os.cpu_count() or 1
+        chunksize = max(1, len(todo) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_convert, todo, chunksize=chunksize))
+
+    errors = {}
+    for rel, (_, error) in zip(todo_rels, results):
+        if error is not None:
+            # left out of the manifest so the next build retries it
+            errors[rel] = error
+            del new_files[rel]
+
+    removed = 0
+    for rel in built_files.keys() - new_files.keys() - errors.keys():
+        # the source is gone
+        (out_dir / Path(rel).with_suffix(".html")).unlink(missing_ok=True)
+        removed += 1
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"config": fingerprint, "files": new_files}, f)
+    os.replace(tmp_path, manifest_path)
+
+    return {
+        "converted": len(todo) - len(errors),
+        "skipped": skipped,
+        "removed": removed,
+        "errors": errors,
+        "bytes": sum(size for size, _ in results),
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+def format_stats(stats: dict) -> str:
+    secs = max(stats["seconds"], 1e-9)
+    return (
+        f"converted {stats['converted']} file(s), skipped {stats['skipped']} "
+        f"unchanged, removed {stats['removed']}, failed {len(stats['errors'])} "
+        f"in {stats['seconds']:.2f}s "
+        f"({stats['converted'] / secs:.1f} files/s, "
+        f"{stats['bytes'] / secs / 1e6:.2f} MB/s)"
+    )
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m upmark",
+        description="Convert a directory tree of .md files to HTML.",
+    )
+    arg_parser.add_argument("src", type=Path, help="directory of .md files")
+    arg_parser.add_argument("out", type=Path, help="output directory")
+    arg_parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="worker processes (default: all CPUs)"
+    )
+    arg_parser.add_argument(
+        "--force", action="store_true", help="ignore the manifest and rebuild everything"
+    )
+    args = arg_parser.parse_args(argv)
+    if not args.src.is_dir():
+        arg_parser.error(f"{args.src} is not a directory")
+    stats = build(args.src, args.out, jobs=args.jobs, force=args.force)
+    for rel, error in sorted(stats["errors"].items()):
+        print(f"{rel}: {error}", file=sys.stderr)
+    print(format_stats(stats))
+    return 1 if stats["errors"] else 0
@@ -0,0 +1,248 @@
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+from typing import Callable
+
+from . import rule
+from .rule import Rule
+
+
+def _hash_header(n: int) -> str:
+    return "".join(f"\n{'#' * (i % 6 + 1)} header number {i}" for i in range(n)) + "\n"
+
+
+def _eq_h1(n: int) -> str:
+    return "".join(f"\nheader number {i}\n===\n" for i in range(n))
+
+
+def _eq_h2(n: int) -> str:
+    return "".join(f"\nheader number {i}\n---\n" for i in range(n))
+
+
+def _ol(n: int) -> str:
+    return "\n" + "".join(f"\n{i}. item number {i}" for i in range(n)) + "\n"
+
+
+def _ul(n: int) -> str:
+    return "\n" + "".join(f"\n{'*-+'[i % 3]} item number {i}" for i in range(n)) + "\n"
+
+
+def _fenced_pre(n: int) -> str:
+    return "".join(f"\n```python\nline {i}\nanother line\n```\n" for i in range(n))
+
+
+def _unclosed_fence(n: int) -> str:
+    return "\n```\n" + "a line of code\n" * n
+
+
+def _indented_pre(n: int) -> str:
+    return "\n" + "".join(f"\n    pre line {i}" for i in range(n)) + "\n"
+
+
+def _block_quote(n: int) -> str:
+    return "\n" + "".join(f"\n> quoted line {i}" for i in range(n)) + "\n"
+
+
+def _wrapping(delimiter: str) -> Callable[[int], str]:
+    def generate(n: int) -> str:
+        return "\n".join(f"some {delimiter}word {i}{delimiter} here" for i in range(n))
+
+    return generate
+
+
+def _unclosed_wrapping(delimiter: str) -> Callable[[int], str]:
+    def generate(n: int) -> str:
+        return "\n".join(f"some {delimiter}word {i} here" for i in range(n))
+
+    return generate
+
+
+def _long_line(prefix: str, fill: str, suffix: str = "x") -> Callable[[int], str]:
+    # grows a single line rather than the number of lines, which is where
+    # backtracking between adjacent quantifiers shows up
+    def generate(n: int) -> str:
+        return prefix + fill * n + suffix
+
+    return generate
+
+
+def _no_eol(generate: Callable[[int], str]) -> Callable[[int], str]:
+    def no_eol(n: int) -> str:
+        return generate(n).rstrip("\n")
+
+    return no_eol
+
+
+GENERATORS: dict[type[Rule], dict[str, Callable[[int], str]]] = {
+    rule.HashHeaderRule: {
+        "headers": _hash_header,
+        "spacing": _long_line("#", " "),
+        "no_eol": _no_eol(_hash_header),
+    },
+    rule.EqH1Rule: {
+        "headers": _eq_h1,
+        "underline": _long_line("header\n", "=", ""),
+        "no_eol": _no_eol(_eq_h1),
+    },
+    rule.EqH2Rule: {
+        "headers": _eq_h2,
+        "underline": _long_line("header\n", "-", ""),
+        "no_eol": _no_eol(_eq_h2),
+    },
+    rule.OlRule: {
+        "items": _ol,
+        "indent": _long_line("para\n\n", " ", "1. x"),
+        "spacing": _long_line("para\n\n1.", "\t "),
+        "no_eol": _no_eol(_ol),
+    },
+    rule.UlRule: {
+        "items": _ul,
+        "indent": _long_line("para\n\n", " ", "* x"),
+        "spacing": _long_line("para\n\n*", " \t"),
+        "no_eol": _no_eol(_ul),
+    },
+    rule.FencedPreRule: {
+        "blocks": _fenced_pre,
+        "unclosed": _unclosed_fence,
+        "fences": _long_line("\n```\n", "```"),
+    },
+    rule.IndentedPreRule: {
+        "lines": _indented_pre,
+        "indent": _long_line("para\n\n", " "),
+        "no_eol": _no_eol(_indented_pre),
+    },
+    rule.BlockQuoteRule: {
+        "lines": _block_quote,
+        "spacing": _long_line("para\n\n>", " "),
+        "no_eol": _no_eol(_block_quote),
+    },
+    rule.EmRule: {
+        "spans": _wrapping("_"),
+        "unclosed": _unclosed_wrapping("_"),
+        "run": _long_line("_", "*"),
+    },
+    rule.BoldRule: {
+        "spans": _wrapping("**"),
+        "unclosed": _unclosed_wrapping("**"),
+        "run": _long_line("__", "*_"),
+    },
+    rule.BoldEmRule: {
+        "spans": _wrapping("***"),
+        "unclosed": _unclosed_wrapping("***"),
+        "run": _long_line("___", "**_"),
+    },
+}
+
+DEFAULT_SIZES = (250, 500, 1000, 2000, 4000)
+DEFAULT_THRESHOLD = 1.3
+DEFAULT_MIN_TIME = 0.2
+MIN_RUNS = 5
+
+
+def time_parse(r: type[Rule], text: str, min_time: float = DEFAULT_MIN_TIME) -> float:
+    # single runs at these sizes are a few milliseconds, so keep going until
+    # enough time has passed and take the median to shed scheduler noise
+    samples = []
+    total = 0.0
+    while len(samples) < MIN_RUNS or total < min_time:
+        t0 = time.perf_counter()
+        r.parse(text, 0, len(text))
+        elapsed = time.perf_counter() - t0
+        samples.append(elapsed)
+        total += elapsed
+    return statistics.median(samples)
+
+
+def fit_exponent(sizes: [int], times: [float]) -> float:
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    num = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    den = sum((x - x_mean) ** 2 for x in xs)
+    if den == 0:
+        return 0.0
+    return num / den
+
+
+def analyze(
+    rules: [type[Rule]] = None,
+    counts: [int] = DEFAULT_SIZES,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_time: float = DEFAULT_MIN_TIME,
+) -> [dict]:
+    results = []
+    for r in rules or GENERATORS:
+        for case, generate in GENERATORS[r].items():
+            texts = [generate(n) for n in counts]
+            sizes = [len(text) for text in texts]
+            times = [time_parse(r, text, min_time) for text in texts]
+            exponent = fit_exponent(sizes, times)
+            results.append(
+                {
+                    "rule": r.__name__,
+                    "case": case,
+                    "sizes": sizes,
+                    "times": times,
+                    "exponent": exponent,
+                    "superlinear": exponent > threshold,
+                }
+            )
+    return results
+
+
+def format_table(results: [dict]) -> str:
+    header = f"{'rule':<16} {'case':<10} {'max bytes':>10} {'max secs':>10} {'exponent':>9}"
+    lines = [header, "-" * len(header)]
+    for res in results:
+        flag = "  SUPERLINEAR" if res["superlinear"] else ""
+        lines.append(
+            f"{res['rule']:<16} {res['case']:<10} {res['sizes'][-1]:>10} "
+            f"{res['times'][-1]:>10.5f} {res['exponent']:>9.2f}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m upmark.complexity",
+        description="Fit empirical time-vs-size exponents for each rule.",
+    )
+    arg_parser.add_argument(
+        "--counts",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="construct repetitions to generate for each input",
+    )
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    arg_parser.add_argument(
+        "--min-time",
+        type=float,
+        default=DEFAULT_MIN_TIME,
+        help="seconds to spend timing each input",
+    )
+    arg_parser.add_argument("--json", metavar="PATH", help="also write JSON here")
+    arg_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit non-zero if any rule's exponent passes the threshold",
+    )
+    args = arg_parser.parse_args(argv)
+    results = analyze(
+        counts=args.counts, threshold=args.threshold, min_time=args.min_time
+    )
+    print(format_table(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.check and any(res["superlinear"] for res in results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
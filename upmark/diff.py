@@ -0,0 +1,41 @@
+from difflib import SequenceMatcher
+from typing import NamedTuple
+
+from .entity import Content, Entity
+
+
+class Patch(NamedTuple):
+    op: str
+    old_start: int
+    old_end: int
+    html: [str]
+
+
+def fingerprint(entity: Entity) -> (type, str):
+    # every entity renders from its own slice of the source, so two blocks
+    # of the same kind over equal slices render identically
+    return type(entity), entity.text[entity.start : entity.end]
+
+
+def diff(old: Content, new: Content) -> [Patch]:
+    old_keys = [fingerprint(el) for el in old.content]
+    new_keys = [fingerprint(el) for el in new.content]
+    matcher = SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+    patches = []
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "equal":
+            continue
+        html = [el.to_string() for el in new.content[j1:j2]]
+        patches.append(Patch(op, i1, i2, html))
+    return patches
+
+
+def apply_patches(blocks: [str], patches: [Patch]) -> [str]:
+    result = []
+    ix = 0
+    for patch in patches:
+        result.extend(blocks[ix : patch.old_start])
+        result.extend(patch.html)
+        ix = patch.old_end
+    result.extend(blocks[ix:])
+    return result
@@ -1,4 +1,21 @@
-from typing import Self
+import heapq
+import re
+from typing import Iterator, Self
+
+_NEEDS_ESCAPE = re.compile(r'[<>&"]')
+
+
+def escape(s: str) -> str:
+    if _NEEDS_ESCAPE.search(s) is None:
+        return s
+    # chained replace is far faster than str.translate with multi-character
+    # replacements; "&" has to go first
+    return (
+        s.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+    )
 
 
 class Entity:
@@ -13,7 +30,7 @@ class Entity:
         self.end = end
 
     def to_string(self):
-        return self.text[self.start : self.end]
+        return escape(self.text[self.start : self.end])
 
     def __eq__(self, other):
         return (
@@ -36,8 +53,10 @@ class Raw(Entity):
         return Raw(self.text, self.start + start_offset, self.end + end_offset)
 
     @classmethod
-    def from_slice(cls, text, start, end):
-        if start >= end or text[start:end].isspace():
+    def from_slice(cls, text, start, end, edges=()):
+        if start >= end:
+            return None
+        if text[start:end].isspace() and start not in edges and end not in edges:
             return None
         return cls(text, start, end)
 
@@ -52,11 +71,57 @@ class Raw(Entity):
         return f'Raw(start={self.start}, end={self.end}, text="{repr(self.text[self.start : min(self.end, self.start + 10)])}...")'
 
 
+class EntityIndex:
+    by_kind: dict[type, [Entity]]
+
+    def __init__(self):
+        self.by_kind = {}
+        self._unsorted = set()
+
+    def add(self, entity: Entity):
+        kind = type(entity)
+        entities = self.by_kind.setdefault(kind, [])
+        if entities and _tree_order(entities[-1]) > _tree_order(entity):
+            self._unsorted.add(kind)
+        entities.append(entity)
+
+    def add_tree(self, entity: Entity):
+        for el in Content([entity]).iter_entities():
+            if not el.is_raw:
+                self.add(el)
+
+    @staticmethod
+    def covers(kind: type) -> bool:
+        # raws keep being split and dropped while rules run, so only the
+        # entities rules build are indexed
+        return not issubclass(Raw, kind) and not issubclass(kind, Raw)
+
+    def find_all(self, kind: type) -> [Entity]:
+        matching = []
+        for k, entities in self.by_kind.items():
+            if issubclass(k, kind):
+                if k in self._unsorted:
+                    entities.sort(key=_tree_order)
+                    self._unsorted.discard(k)
+                matching.append(entities)
+        if len(matching) == 1:
+            return list(matching[0])
+        return list(heapq.merge(*matching, key=_tree_order))
+
+
+def _tree_order(entity: Entity) -> (int, int):
+    # a parent starts no later than its children and ends no earlier, so
+    # this matches a pre-order walk
+    return entity.start, -entity.end
+
+
 class Content:
     content: [Entity]
+    index: EntityIndex | None
 
-    def __init__(self, content: [Entity]):
+    def __init__(self, content: [Entity], index: EntityIndex | None = None):
         self.content = content
+        self.index = index
 
     @classmethod
     def raw_from_str(cls, text: str) -> Self:
@@ -70,6 +135,28 @@ class Content:
     def to_string(self):
         return "".join(entity.to_string() for entity in self.content)
 
+    def iter_entities(self) -> Iterator[Entity]:
+        stack = list(reversed(self.content))
+        while stack:
+            el = stack.pop()
+            yield el
+            children = getattr(el, "content", None)
+            if isinstance(children, Content):
+                children = children.content
+            if isinstance(children, list):
+                stack.extend(reversed(children))
+
+    def find_all(self, kind: type) -> [Entity]:
+        if self.index is not None and self.index.covers(kind):
+            return self.index.find_all(kind)
+        return [el for el in self.iter_entities() if isinstance(el, kind)]
+
+    def outline(self) -> [(int, str)]:
+        return [
+            (header.level, header.content.to_string())
+            for header in self.find_all(HeaderEntity)
+        ]
+
     def __eq__(self, other):
         if isinstance(other, list):
             for this, that in zip(self.content, other):
@@ -141,7 +228,7 @@ class Unannotated(Entity):
         super().__init__(start, end)
 
     def to_string(self):
-        return self.text[self.start : self.end]
+        return escape(self.text[self.start : self.end])
 
     def __repr__(self):
         return f'Unannotated(start={self.start}, end={self.end}, text="{repr(self.text[self.start :: self.start + 10])}...")'
@@ -268,7 +355,7 @@ class FencedPreEntity(Entity):
 
     def to_string(self):
         open_tag = f'<pre data-language="{self.lang}">' if self.lang else "<pre>"
-        return f"{open_tag}{self.content}</pre>"
+        return f"{open_tag}{escape(self.content)}</pre>"
 
     def __repr__(self):
         return f'''PreEntity(
@@ -309,7 +396,7 @@ class IndentedPreEntity(Entity):
         self.content.append(line)
 
     def to_string(self):
-        return f"<pre>{'\n'.join(str(el) for el in self.content)}</pre>"
+        return f"<pre>{'\n'.join(el.to_string() for el in self.content)}</pre>"
 
     def __repr__(self):
         return f'''IndentedPreEntity(
@@ -327,7 +414,7 @@ class BlockQuoteLineEntity(Entity):
         super().__init__(text, max(st, end), end)
 
     def to_string(self):
-        return f"<p>{self.content}</p>"
+        return f"<p>{escape(self.text[self.start : self.end])}</p>"
 
     def __repr__(self):
         return f'''BlockQuoteLineEntity(
@@ -348,7 +435,7 @@ class BlockQuoteEntity(Entity):
 
     def to_string(self):
         return (
-            f"\n<blockquote>{'\n'.join(str(el) for el in self.content)}</blockquote>\n"
+            f"\n<blockquote>{'\n'.join(el.to_string() for el in self.content)}</blockquote>\n"
         )
 
     def __repr__(self):
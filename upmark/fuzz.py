@@ -0,0 +1,286 @@
+import argparse
+import hashlib
+import math
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from .complexity import GENERATORS
+from .parser import Parser
+from .rule import DEFAULT_RULES
+
+ROOT = Path(__file__).parent
+REGRESSION_DIR = ROOT / "tests" / "slow_inputs"
+DEFAULT_BUDGET = 2.0
+# how many times the seeds' median time per byte an input has to take; the
+# seeds are timed on the same machine, so the verdict doesn't depend on it
+DEFAULT_FACTOR = 10.0
+DEFAULT_MIN_SECONDS = 0.005
+LONG_RUN = 20_000
+
+_parser = Parser(DEFAULT_RULES)
+
+
+def parse_time(text: str, repeat: int = 1) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _parser.parse(text)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def per_byte_baseline(texts: [str]) -> float:
+    return statistics.median(parse_time(text, 3) / max(len(text), 1) for text in texts)
+
+
+def is_slow(
+    seconds: float,
+    size: int,
+    baseline: float,
+    factor: float = DEFAULT_FACTOR,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+) -> bool:
+    return seconds >= min_seconds and seconds / max(size, 1) > factor * baseline
+
+
+def seeds(regressions: bool = True) -> [str]:
+    found = []
+    test_md = ROOT.parent / "test.md"
+    if test_md.exists():
+        found.append(test_md.read_text())
+    if regressions and REGRESSION_DIR.is_dir():
+        found.extend(p.read_text() for p in sorted(REGRESSION_DIR.glob("*.md")))
+    for generators in GENERATORS.values():
+        found.extend(generate(200) for generate in generators.values())
+    return found
+
+
+def _lines(text: str) -> [str]:
+    return text.split("\n")
+
+
+def _run_length(rng: random.Random, short: int) -> int:
+    # mostly short runs, but sometimes a single line long enough to show
+    # costs that grow with the length of a line
+    if rng.random() < 0.25:
+        return rng.randint(short, LONG_RUN)
+    return rng.randint(1, short)
+
+
+def _insert_line(rng: random.Random, text: str, line: str) -> str:
+    lines = _lines(text)
+    lines.insert(rng.randrange(len(lines) + 1), line)
+    return "\n".join(lines)
+
+
+def unclosed_fence(rng, text):
+    return _insert_line(rng, text, rng.choice(["```", "~~~", "```python"]))
+
+
+def delimiter_run(rng, text):
+    run = rng.choice(["*", "_", "*_", "**_"]) * _run_length(rng, 200)
+    ix = rng.randrange(len(text) + 1)
+    return text[:ix] + run + text[ix:]
+
+
+def space_run(rng, text):
+    run = rng.choice([" ", "\t", " \t"]) * _run_length(rng, 50)
+    ix = rng.randrange(len(text) + 1)
+    return text[:ix] + run + text[ix:]
+
+
+def deep_indent(rng, text):
+    lines = _lines(text)
+    ix = rng.randrange(len(lines))
+    lines[ix] = rng.choice(["\t", "    ", " "]) * _run_length(rng, 50) + lines[ix]
+    return "\n".join(lines)
+
+
+def drop_final_newline(rng, text):
+    return text.rstrip("\n")
+
+
+def quote_lines(rng, text):
+    quotes = "\n".join(
+        rng.choice([">", "> quoted", ">> nested"]) for _ in range(rng.randint(1, 200))
+    )
+    return _insert_line(rng, text, "\n" + quotes + "\n")
+
+
+def underline_run(rng, text):
+    return _insert_line(rng, text, rng.choice("=-") * rng.randint(2, 500))
+
+
+def list_run(rng, text):
+    items = "\n".join(
+        f"{rng.choice(['', '\t', '    '])}{rng.choice(['-', '*', '+', '1.'])} item"
+        for _ in range(rng.randint(1, 200))
+    )
+    return _insert_line(rng, text, "\n" + items + "\n")
+
+
+def duplicate(rng, text):
+    lines = _lines(text)
+    start = rng.randrange(len(lines))
+    end = rng.randint(start, len(lines))
+    return "\n".join(lines[:end] + lines[start:end] + lines[end:])
+
+
+def delete_lines(rng, text):
+    lines = _lines(text)
+    start = rng.randrange(len(lines))
+    end = rng.randint(start, min(len(lines), start + 5))
+    return "\n".join(lines[:start] + lines[end:])
+
+
+MUTATIONS = [
+    unclosed_fence,
+    delimiter_run,
+    space_run,
+    deep_indent,
+    drop_final_newline,
+    quote_lines,
+    underline_run,
+    list_run,
+    duplicate,
+    delete_lines,
+]
+
+
+def mutate(rng: random.Random, text: str, rounds: int = 3) -> str:
+    for _ in range(rng.randint(1, rounds)):
+        text = rng.choice(MUTATIONS)(rng, text)
+    return text
+
+
+class Runner:
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.pool = None
+        self.baseline = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+
+    def _pool(self) -> multiprocessing.Pool:
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(1)
+        return self.pool
+
+    def calibrate(self, texts: [str]) -> float:
+        self.baseline = self._pool().apply(per_byte_baseline, (texts,))
+        return self.baseline
+
+    def time(self, text: str) -> float:
+        # regex matching can't be interrupted in-process, so runaway inputs
+        # are killed with their worker
+        self._pool()
+        try:
+            # best of three keeps scheduler and GC noise out of the verdict
+            return self.pool.apply_async(parse_time, (text, 3)).get(self.budget * 3)
+        except multiprocessing.TimeoutError:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+            # a hang is interesting however large the input is
+            return math.inf
+        except Exception:
+            # inputs the parser rejects aren't performance bugs
+            return 0.0
+
+
+def minimize(text: str, interesting) -> str:
+    lines = _lines(text)
+    chunk = len(lines) // 2
+    while chunk >= 1:
+        ix = 0
+        while ix < len(lines):
+            candidate = lines[:ix] + lines[ix + chunk :]
+            if candidate and interesting("\n".join(candidate)):
+                lines = candidate
+            else:
+                ix += chunk
+        chunk //= 2
+    return "\n".join(lines)
+
+
+def save(text: str, directory: Path = REGRESSION_DIR) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    name = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    path = directory / f"{name}.md"
+    path.write_text(text)
+    return path
+
+
+def fuzz(
+    iterations: int,
+    seed: int | None = None,
+    budget: float = DEFAULT_BUDGET,
+    factor: float = DEFAULT_FACTOR,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+    directory: Path = REGRESSION_DIR,
+) -> [Path]:
+    rng = random.Random(seed)
+    corpus = seeds()
+    saved = []
+    with Runner(budget) as runner:
+        baseline = runner.calibrate(seeds(regressions=False))
+
+        def interesting(text):
+            return is_slow(
+                runner.time(text), len(text), baseline, factor, min_seconds
+            )
+
+        for _ in range(iterations):
+            text = mutate(rng, rng.choice(corpus))
+            if interesting(text):
+                path = save(minimize(text, interesting), directory)
+                saved.append(path)
+                print(f"slow input saved to {path}")
+            elif len(corpus) < 1000:
+                corpus.append(text)
+    return saved
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m upmark.fuzz",
+        description="Mutate seed documents looking for slow-to-parse inputs.",
+    )
+    arg_parser.add_argument("-n", "--iterations", type=int, default=1000)
+    arg_parser.add_argument("--seed", type=int, default=None)
+    arg_parser.add_argument(
+        "--budget", type=float, default=DEFAULT_BUDGET, help="seconds per input"
+    )
+    arg_parser.add_argument(
+        "--factor",
+        type=float,
+        default=DEFAULT_FACTOR,
+        help="multiple of the seeds' median time per byte that counts as slow",
+    )
+    arg_parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS)
+    arg_parser.add_argument("--out", type=Path, default=REGRESSION_DIR)
+    args = arg_parser.parse_args(argv)
+    saved = fuzz(
+        args.iterations,
+        seed=args.seed,
+        budget=args.budget,
+        factor=args.factor,
+        min_seconds=args.min_seconds,
+        directory=args.out,
+    )
+    print(f"{len(saved)} slow input(s) found")
+    return 1 if saved else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+from .entity import escape
+from .rule import INLINE_RULES
+
+_rules = tuple(INLINE_RULES)
+
+
+def _has_delimiter(s: str, start: int = 0, end: int | None = None) -> bool:
+    # every inline rule is delimited by "*" or "_"
+    return s.find("*", start, end) >= 0 or s.find("_", start, end) >= 0
+
+
+def _render(s: str, start: int, end: int, depth: int) -> str:
+    # same result as Parser(INLINE_RULES).parse(...).to_string() without
+    # building Content lists: inline entities never nest, so every raw
+    # piece left between matches just moves on to the next rule
+    if depth == len(_rules) or not _has_delimiter(s, start, end):
+        if start >= end or s[start:end].isspace():
+            return ""
+        return escape(s[start:end])
+    rule = _rules[depth]
+    parts = []
+    raw_ix = start
+    for m in rule.pattern.finditer(s, start, end):
+        parts.append(_render(s, raw_ix, m.start(), depth + 1))
+        parts.append(rule.parse_entity(s, m).to_string())
+        raw_ix = max(raw_ix, m.end())
+    parts.append(_render(s, raw_ix, end, depth + 1))
+    return "".join(parts)
+
+
+def render_inline(s: str) -> str:
+    if not _has_delimiter(s):
+        return escape(s)
+    return _render(s, 0, len(s), 0)
+
+
+def render_inline_many(strings: [str]) -> [str]:
+    return [
+        escape(s) if "*" not in s and "_" not in s else _render(s, 0, len(s), 0)
+        for s in strings
+    ]
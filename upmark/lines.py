@@ -0,0 +1,158 @@
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is missing
+    np = None
+
+HASH = 1
+QUOTE = 2
+DIGIT = 4
+BULLET = 8
+INDENT = 16
+EQ = 32
+DASH = 64
+FENCE = 128
+
+# past this share of candidate lines, finditer over a whole span is cheaper
+# than one search per window
+MAX_CANDIDATE_FRACTION = 0.05
+
+_LEAD_FLAGS = {
+    "#": HASH,
+    ">": QUOTE,
+    "*": BULLET,
+    "+": BULLET,
+    "-": BULLET | DASH,
+    "\t": INDENT,
+    " ": INDENT,
+    "=": EQ,
+    "`": FENCE,
+    "~": FENCE,
+    **{d: DIGIT for d in "0123456789"},
+}
+
+_FLAG_TABLE = [0] * 128
+for _ch, _flag in _LEAD_FLAGS.items():
+    _FLAG_TABLE[ord(_ch)] = _flag
+
+
+class LineTable:
+    starts: [int]
+    ends: [int]
+    flags: [int]
+    length: int
+
+    def __init__(self, starts, ends, flags, length):
+        self.starts = starts
+        self.ends = ends
+        self.flags = flags
+        self.length = length
+
+    @classmethod
+    def from_str(cls, text: str, use_numpy: bool | None = None) -> "LineTable":
+        if use_numpy is None:
+            use_numpy = np is not None
+        if use_numpy:
+            return cls._from_str_numpy(text)
+        return cls._from_str_python(text)
+
+    @classmethod
+    def _from_str_numpy(cls, text: str) -> "LineTable":
+        if text.isascii():
+            arr = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+        else:
+            # utf-32 keeps array indices equal to str indices
+            arr = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        newlines = np.flatnonzero(arr == 10)
+        starts = np.concatenate(([0], newlines + 1))
+        ends = np.concatenate((newlines, [len(arr)]))
+        padded = np.concatenate((arr, [0])).astype(np.uint32)
+        lead = padded[starts]
+        table = np.zeros(max(int(lead.max(initial=0)) + 1, 128), dtype=np.uint8)
+        table[:128] = _FLAG_TABLE
+        flags = table[lead]
+        return cls(starts, ends, flags, len(text))
+
+    @classmethod
+    def _from_str_python(cls, text: str) -> "LineTable":
+        starts = []
+        ends = []
+        flags = []
+        ix = 0
+        for line in text.split("\n"):
+            starts.append(ix)
+            ix += len(line)
+            ends.append(ix)
+            ix += 1
+            lead = ord(line[0]) if line else 0
+            flags.append(_FLAG_TABLE[lead] if lead < 128 else 0)
+        return cls(starts, ends, flags, len(text))
+
+    def candidate_fraction(self, mask: int) -> float:
+        if np is not None and isinstance(self.flags, np.ndarray):
+            count = int(np.count_nonzero(self.flags & mask))
+        else:
+            count = sum(1 for flag in self.flags if flag & mask)
+        return count / len(self.flags)
+
+    def _runs(self, mask: int) -> [(int, int)]:
+        if np is not None and isinstance(self.flags, np.ndarray):
+            cand = (self.flags & mask) != 0
+            edges = np.diff(np.concatenate(([False], cand, [False])).astype(np.int8))
+            firsts = np.flatnonzero(edges == 1)
+            lasts = np.flatnonzero(edges == -1) - 1
+            return list(zip(firsts.tolist(), lasts.tolist()))
+        runs = []
+        first = None
+        for i, flag in enumerate(self.flags):
+            if flag & mask:
+                if first is None:
+                    first = i
+            elif first is not None:
+                runs.append((first, i - 1))
+                first = None
+        if first is not None:
+            runs.append((first, len(self.flags) - 1))
+        return runs
+
+    def windows(self, mask: int, lookbehind: int = 0) -> [(int, int)]:
+        if np is not None and isinstance(self.flags, np.ndarray):
+            return self._windows_numpy(mask, lookbehind)
+        windows = []
+        for first, last in self._runs(mask):
+            start = max(int(self.starts[max(first - lookbehind, 0)]) - 1, 0)
+            end = min(int(self.ends[last]) + 1, self.length)
+            if windows and start <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], end)
+            else:
+                windows.append((start, end))
+        return windows
+
+    def _windows_numpy(self, mask: int, lookbehind: int) -> [(int, int)]:
+        cand = (self.flags & mask) != 0
+        edges = np.diff(np.concatenate(([False], cand, [False])).astype(np.int8))
+        firsts = np.flatnonzero(edges == 1)
+        if not len(firsts):
+            return []
+        lasts = np.flatnonzero(edges == -1) - 1
+        starts = np.maximum(self.starts[np.maximum(firsts - lookbehind, 0)] - 1, 0)
+        ends = np.minimum(self.ends[lasts] + 1, self.length)
+        # runs are in order, so a window only ever merges into the one before
+        new = np.concatenate(([True], starts[1:] > ends[:-1]))
+        group_lasts = np.concatenate((np.flatnonzero(new)[1:] - 1, [len(ends) - 1]))
+        return list(zip(starts[new].tolist(), ends[group_lasts].tolist()))
+
+
+def clip_windows(
+    windows: [(int, int)], start: int, end: int, lo: int = 0
+) -> [(int, int)]:
+    ix = bisect_right(windows, (start, end), lo)
+    if ix > lo and windows[ix - 1][1] > start:
+        ix -= 1
+    clipped = []
+    while ix < len(windows) and windows[ix][0] < end:
+        ws, we = windows[ix]
+        clipped.append((max(ws, start), min(we, end)))
+        ix += 1
+    return clipped
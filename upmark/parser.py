@@ -1,25 +1,109 @@
-from .entity import Content
+from .blocks import BlockIndex
+from .entity import Content, EntityIndex, Raw
+from . import lines
+from .lines import LineTable, clip_windows
 from .rule import Rule
 
 
 class Parser:
     blocks: [Rule]
+    index: bool
+    classify_lines: bool
+    block_index: BlockIndex | None
     # finalizer: Callable[[Raw], Content]
 
-    def __init__(self, blocks: [Rule], finalizer=None):
+    def __init__(
+        self, blocks: [Rule], finalizer=None, *, index=False, classify_lines=False
+    ):
         self.blocks = blocks
+        self.index = index
+        # without numpy, classifying lines costs more than the scans it saves
+        self.classify_lines = classify_lines and lines.np is not None
+        self.block_index = None
 
     def parse(self, text: str) -> Content:
-        content = Content.raw_from_str(text)
+        line_table = LineTable.from_str(text) if self.classify_lines else None
+        return self.apply_rules(text, Content.raw_from_str(text), line_table)
+
+    def parse_range(self, text: str, start: int, end: int, edges=()) -> Content:
+        # whitespace touching any of `edges` is kept, but not parsed further,
+        # so that callers can decide about it once the neighbouring ranges are
+        # known
+        content = Content.raw_remainder(text, start, end)
+        return self.apply_rules(text, content, edges=edges)
+
+    def apply_rules(
+        self,
+        text: str,
+        content: Content,
+        line_table: LineTable | None = None,
+        edges=(),
+    ) -> Content:
+        idx = EntityIndex() if self.index else None
         for rule in self.blocks:
-            content = self.apply_rule(text, rule, content)
+            content = self.apply_rule(text, rule, content, idx, line_table, edges)
+        content.index = idx
         return content
 
-    def apply_rule(self, text: str, rule: Rule, content: Content):
+    def get_block_index(self, text: str) -> BlockIndex:
+        if self.block_index is None or self.block_index.text != text:
+            self.block_index = BlockIndex(self, text)
+        return self.block_index
+
+    def render_range(self, text: str, start_block: int, count: int) -> str:
+        return self.get_block_index(text).render_range(start_block, count)
+
+    def apply_rule(
+        self,
+        text: str,
+        rule: Rule,
+        content: Content,
+        idx: EntityIndex | None = None,
+        line_table: LineTable | None = None,
+        edges=(),
+    ):
+        windows = None
+        if (
+            line_table is not None
+            and rule.line_classes
+            and line_table.candidate_fraction(rule.line_classes)
+            <= lines.MAX_CANDIDATE_FRACTION
+        ):
+            windows = line_table.windows(rule.line_classes, rule.line_lookbehind)
+        # raws are in order, so the windows are walked once per rule
+        wi = 0
         new_content = []
         for entity in content.content:
-            if entity.is_raw:
-                new_content.extend(rule.parse(text, entity.start, entity.end))
+            if (
+                entity.is_raw
+                and (entity.start in edges or entity.end in edges)
+                and text[entity.start : entity.end].isspace()
+            ):
+                # kept for the caller; no rule gets to match it
+                new_content.append(entity)
+            elif entity.is_raw:
+                if windows is None:
+                    skip = not rule.precheck(text, entity.start, entity.end)
+                else:
+                    while wi < len(windows) and windows[wi][1] <= entity.start:
+                        wi += 1
+                    clipped = clip_windows(windows, entity.start, entity.end, wi)
+                    skip = not clipped
+                if skip:
+                    if Raw.from_slice(text, entity.start, entity.end, edges) is not None:
+                        new_content.append(entity)
+                    continue
+                if windows is None:
+                    parsed = rule.parse(text, entity.start, entity.end, edges)
+                else:
+                    parsed = rule.parse_windows(
+                        text, entity.start, entity.end, clipped, edges
+                    )
+                if idx is not None:
+                    for el in parsed:
+                        if not el.is_raw:
+                            idx.add_tree(el)
+                new_content.extend(parsed)
             else:
                 new_content.append(entity)
         return Content(new_content)
@@ -1,32 +1,83 @@
 import re
-from . import entity
+from typing import Iterable
+from . import entity, lines
 from .entity import Content, Entity
 
 
+INDENT_TRIGGERS = ("\n\n\t", "\n\n    ")
+DOUBLE_DELIMITERS = ("**", "__", "*_", "_*")
+
+
 class Rule:
     pattern: re.Pattern
+    # leading-character classes (see upmark.lines) every line of a match
+    # starts with, and how many lines before a run of such lines a match
+    # may begin; 0 means the rule can't be restricted to candidate lines
+    line_classes: int = 0
+    line_lookbehind: int = 0
+    # literals at least one of which must occur in any match; empty means
+    # the rule is always run
+    triggers: tuple[str, ...] = ()
+    # whether a match can run across blank lines; such rules are scanned
+    # over the whole text before it is split into blocks
+    crosses_blank_lines: bool = False
+
+    @classmethod
+    def precheck(cls, text: str, start: int, end: int) -> bool:
+        if not cls.triggers:
+            return True
+        return any(text.find(trigger, start, end) != -1 for trigger in cls.triggers)
 
     @classmethod
     def parse_entity(cls, text: str, m: re.Match) -> Entity:
         raise NotImplementedError
 
     @classmethod
-    def parse(cls, text: str, start: int, end: int) -> [Entity]:
+    def parse(cls, text: str, start: int, end: int, edges=()) -> [Entity]:
+        return cls.from_matches(
+            text, start, end, cls.pattern.finditer(text, start, end), edges
+        )
+
+    @classmethod
+    def parse_windows(
+        cls, text: str, start: int, end: int, windows: [(int, int)], edges=()
+    ) -> [Entity]:
+        return cls.from_matches(
+            text, start, end, cls.iter_windows(text, windows), edges
+        )
+
+    @classmethod
+    def iter_windows(cls, text: str, windows: [(int, int)]) -> Iterable[re.Match]:
+        pos = 0
+        for ws, we in windows:
+            for match in cls.pattern.finditer(text, max(ws, pos), we):
+                pos = match.end()
+                yield match
+
+    @classmethod
+    def from_matches(
+        cls, text: str, start: int, end: int, matches: Iterable[re.Match], edges=()
+    ) -> [Entity]:
         content = []
         raw_ix = start
-        for match in cls.pattern.finditer(text, start, end):
+        for match in matches:
             if (
-                raw_before := entity.Raw.from_slice(text, raw_ix, match.start())
+                raw_before := entity.Raw.from_slice(
+                    text, raw_ix, match.start(), edges
+                )
             ) is not None:
                 content.append(raw_before)
             content.append(cls.parse_entity(text, match))
             raw_ix = max(raw_ix, match.end())
-        if (raw_after := entity.Raw.from_slice(text, raw_ix, end)) is not None:
+        if (raw_after := entity.Raw.from_slice(text, raw_ix, end, edges)) is not None:
             content.append(raw_after)
         return content
 
 
 class HashHeaderRule(Rule):
+    # no line_classes: \s* lets a match run on past the "#" line
+    triggers = ("#",)
+    crosses_blank_lines = True
     pattern = re.compile(r"(?P<pre>^|\n)(?P<level>#{1,6})\s*(?P<text>.+)")
 
     @classmethod
@@ -42,6 +93,9 @@ class HashHeaderRule(Rule):
 
 
 class EqH1Rule(Rule):
+    line_classes = lines.EQ
+    line_lookbehind = 1
+    triggers = ("\n==",)
     pattern = re.compile(r"(?P<pre>^|\n)(?P<text>.+)\n={2,}\n")
 
     @classmethod
@@ -57,6 +111,9 @@ class EqH1Rule(Rule):
 
 
 class EqH2Rule(Rule):
+    line_classes = lines.DASH
+    line_lookbehind = 1
+    triggers = ("\n--",)
     pattern = re.compile(r"(?P<pre>^|\n)(?P<text>.+)\n-{2,}+\n")
 
     @classmethod
@@ -77,10 +134,23 @@ class ListLikeRule(Rule):
     pattern: re.Pattern
 
     @classmethod
-    def __init_subclass__(cls, /, list_entity, item_pat, **kwargs):
+    def __init_subclass__(
+        cls, /, list_entity, item_pat, line_classes=0, item_starts=None, **kwargs
+    ):
+        # both are opt-in: without them the rule is run over every span
+        if line_classes:
+            cls.line_classes = line_classes | lines.INDENT
+            cls.line_lookbehind = 1
+        if item_starts is not None:
+            cls.triggers = (
+                tuple(f"\n\n{ch}" for ch in item_starts) + INDENT_TRIGGERS
+            )
         cls.list_entity = list_entity
         cls.item_pattern = re.compile(item_pat)
-        cls.pattern = re.compile("\n" + item_pat + "+\n")
+        # each item is a whole line, so giving part of one back can't help
+        # the match; atomic groups stop the retry of every split between the
+        # item's quantifiers, which is quadratic in the line's length
+        cls.pattern = re.compile("\n(?>" + item_pat + ")+\n")
 
     @classmethod
     def parse_entity(cls, text: str, m: re.Match) -> Entity:
@@ -114,6 +184,8 @@ class ListLikeRule(Rule):
 class OlRule(
     ListLikeRule,
     list_entity=entity.OrderedListEntity,
+    line_classes=lines.DIGIT,
+    item_starts="0123456789",
     item_pat=r"(\n(?P<indent>(\t| {4,}))?\d+\.[\t ]+(?P<text>.+))",
 ):
     pass
@@ -122,13 +194,17 @@ class OlRule(
 class UlRule(
     ListLikeRule,
     list_entity=entity.UnorderedListEntity,
+    line_classes=lines.BULLET,
+    item_starts="-*+",
     item_pat=r"(\n(?P<indent>(\t| {4,}))?[-*+][\t ]+(?P<text>.+))",
 ):
     pass
 
 
 class FencedPreRule(Rule):
-    pattern = re.compile(r"\n(```|~~~)(?P<lang>\w+)?\n(?P<text>(.|\n)+)\1\n")
+    triggers = ("\n```", "\n~~~")
+    crosses_blank_lines = True
+    pattern = re.compile(r"\n(```|~~~)(?P<lang>\w+)?\n(?P<text>[\s\S]+?)\1\n")
 
     @classmethod
     def parse_entity(cls, text: str, m: re.Match) -> Entity:
@@ -138,9 +214,13 @@ class FencedPreRule(Rule):
 
 
 class IndentedPreRule(Rule):
+    line_classes = lines.INDENT
+    line_lookbehind = 1
+    triggers = INDENT_TRIGGERS
     LINE_PAT = r"(\n(\t| {4,})(?P<text>.+))"
     line_pattern = re.compile(LINE_PAT)
-    pattern = re.compile("\n" + LINE_PAT + "+\n")
+    # atomic for the same reason as list items
+    pattern = re.compile("\n(?>" + LINE_PAT + ")+\n")
 
     @classmethod
     def parse_entity(cls, text: str, m: re.Match) -> Entity:
@@ -156,6 +236,9 @@ class IndentedPreRule(Rule):
 
 
 class BlockQuoteRule(Rule):
+    line_classes = lines.QUOTE
+    line_lookbehind = 1
+    triggers = ("\n\n>",)
     LINE_PAT = r"(\n>( (?P<text>.+))?)"
     line_pattern = re.compile(LINE_PAT)
     pattern = re.compile("\n" + LINE_PAT + "+\n")
@@ -180,10 +263,11 @@ class SimpleWrappingRule(Rule):
     entity: Entity
 
     @classmethod
-    def __init_subclass__(cls, /, delimiter, entity, **kwargs):
+    def __init_subclass__(cls, /, delimiter, entity, triggers=(), **kwargs):
         pat_str = f"({delimiter})(?P<text>.+)(\\1)"
         cls.pattern = re.compile(pat_str)
         cls.entity = entity
+        cls.triggers = triggers
 
     @classmethod
     def parse_entity(cls, text: str, m: re.Match) -> Entity:
@@ -195,18 +279,50 @@ class SimpleWrappingRule(Rule):
         )
 
 
-class EmRule(SimpleWrappingRule, delimiter="[*_]", entity=entity.EmEntity):
+class EmRule(
+    SimpleWrappingRule,
+    delimiter="[*_]",
+    entity=entity.EmEntity,
+    triggers=("*", "_"),
+):
     pass
 
 
-class BoldRule(SimpleWrappingRule, delimiter="[*_]{2}", entity=entity.BoldEntity):
+class BoldRule(
+    SimpleWrappingRule,
+    delimiter="[*_]{2}",
+    entity=entity.BoldEntity,
+    triggers=DOUBLE_DELIMITERS,
+):
     pass
 
 
-class BoldEmRule(SimpleWrappingRule, delimiter="[*_]{3}", entity=entity.BoldEmEntity):
+class BoldEmRule(
+    SimpleWrappingRule,
+    delimiter="[*_]{3}",
+    entity=entity.BoldEmEntity,
+    triggers=DOUBLE_DELIMITERS,
+):
     pass
 
 
+INLINE_RULES = [BoldEmRule, BoldRule, EmRule]
+
+DEFAULT_RULES = [
+    FencedPreRule,
+    HashHeaderRule,
+    EqH1Rule,
+    EqH2Rule,
+    OlRule,
+    UlRule,
+    IndentedPreRule,
+    BlockQuoteRule,
+    BoldEmRule,
+    BoldRule,
+    EmRule,
+]
+
+
 def parse_indent(indent: str | None) -> int:
     if indent is None:
         return 0
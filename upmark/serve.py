@@ -0,0 +1,291 @@
+import argparse
+import bisect
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .build import config_fingerprint
+from .parser import Parser
+from .rule import DEFAULT_RULES
+
+DEFAULT_MAX_BYTES = 1 << 20
+DEFAULT_CACHE_SIZE = 1024
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_parser = Parser(DEFAULT_RULES)
+# changes whenever the rules or the renderer do, so ETags from an older
+# deploy stop matching
+RENDER_VERSION = config_fingerprint(DEFAULT_RULES)[:16]
+
+
+def render(text: str) -> str:
+    return _parser.parse(text).to_string()
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+class LengthRequired(Exception):
+    pass
+
+
+class Metrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.latency_counts = [0] * (len(buckets) + 1)
+        self.latency_sum = 0.0
+        self.requests = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def observe(self, route: str, status: int, seconds: float, bytes_in: int, bytes_out: int):
+        with self.lock:
+            key = f"{route} {status}"
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.latency_sum += seconds
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def cache_lookup(self, hit: bool):
+        with self.lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            lookups = self.cache_hits + self.cache_misses
+            histogram = {f"le_{b}": 0 for b in self.buckets}
+            cumulative = 0
+            for b, count in zip(self.buckets, self.latency_counts):
+                cumulative += count
+                histogram[f"le_{b}"] = cumulative
+            histogram["le_inf"] = cumulative + self.latency_counts[-1]
+            return {
+                "requests": dict(self.requests),
+                "latency_seconds": {
+                    "histogram": histogram,
+                    "sum": self.latency_sum,
+                    "count": histogram["le_inf"],
+                },
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            }
+
+
+class RenderService:
+    executor: Executor | None
+
+    def __init__(
+        self,
+        workers: int = 0,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.executor = ProcessPoolExecutor(workers) if workers > 0 else None
+        self.cache_size = cache_size
+        self.max_bytes = max_bytes
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.metrics = Metrics()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def _cached(self, etag: str) -> str | None:
+        with self.cache_lock:
+            html = self.cache.get(etag)
+            if html is not None:
+                self.cache.move_to_end(etag)
+        self.metrics.cache_lookup(html is not None)
+        return html
+
+    def _store(self, etag: str, html: str):
+        with self.cache_lock:
+            self.cache[etag] = html
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def render_many(self, texts: [str]) -> [(str, str)]:
+        etags = [etag_for(text) for text in texts]
+        results = [self._cached(etag) for etag in etags]
+        misses = [i for i, html in enumerate(results) if html is None]
+        if misses:
+            todo = [texts[i] for i in misses]
+            if self.executor is None:
+                rendered = [render(text) for text in todo]
+            else:
+                rendered = list(self.executor.map(render, todo))
+            for i, html in zip(misses, rendered):
+                results[i] = html
+                self._store(etags[i], html)
+        return list(zip(etags, results))
+
+    def render(self, text: str) -> (str, str):
+        return self.render_many([text])[0]
+
+
+def etag_for(text: str, version: str = RENDER_VERSION) -> str:
+    h = hashlib.sha256(version.encode())
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return '"' + h.hexdigest()[:32] + '"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+def make_handler(service: RenderService) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str, headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+            return len(body)
+
+        def _read_body(self) -> bytes:
+            if "Transfer-Encoding" in self.headers:
+                raise LengthRequired()
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError("negative Content-Length")
+            if length > service.max_bytes:
+                raise RequestTooLarge()
+            return self.rfile.read(length)
+
+        def _handle(self, name, route):
+            t0 = time.perf_counter()
+            body = None
+            try:
+                body = self._read_body() if self.command == "POST" else b""
+                status, bytes_out = route(body)
+            except RequestTooLarge:
+                self.close_connection = True
+                status = 413
+                bytes_out = self._send(status, b"request too large\n", "text/plain")
+            except LengthRequired:
+                self.close_connection = True
+                status = 411
+                bytes_out = self._send(status, b"length required\n", "text/plain")
+            except (UnicodeDecodeError, ValueError, TypeError):
+                if body is None:
+                    # an unread body would be taken for the next request
+                    self.close_connection = True
+                status = 400
+                bytes_out = self._send(status, b"bad request\n", "text/plain")
+            except Exception:
+                status = 500
+                bytes_out = self._send(status, b"render failed\n", "text/plain")
+            service.metrics.observe(
+                name, status, time.perf_counter() - t0, len(body or b""), bytes_out
+            )
+
+        def _not_found(self, body: bytes):
+            return 404, self._send(404, b"not found\n", "text/plain")
+
+        def _render(self, body: bytes):
+            text = body.decode("utf-8")
+            etag = etag_for(text)
+            if etag_matches(etag, self.headers.get("If-None-Match", "")):
+                return 304, self._send(304, b"", "text/html", {"ETag": etag})
+            etag, html = service.render(text)
+            return 200, self._send(
+                200, html.encode("utf-8"), "text/html; charset=utf-8", {"ETag": etag}
+            )
+
+        def _render_batch(self, body: bytes):
+            texts = json.loads(body)
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                raise ValueError("expected a JSON list of strings")
+            results = [
+                {"etag": etag, "html": html} for etag, html in service.render_many(texts)
+            ]
+            return 200, self._send(
+                200, json.dumps(results).encode("utf-8"), "application/json"
+            )
+
+        def _metrics(self, body: bytes):
+            snapshot = json.dumps(service.metrics.snapshot()).encode("utf-8")
+            return 200, self._send(200, snapshot, "application/json")
+
+        def do_POST(self):
+            routes = {
+                "/render": ("render", self._render),
+                "/render/batch": ("render_batch", self._render_batch),
+            }
+            self._handle(*routes.get(self.path, ("other", self._not_found)))
+
+        def do_GET(self):
+            routes = {"/metrics": ("metrics", self._metrics)}
+            self._handle(*routes.get(self.path, ("other", self._not_found)))
+
+    return Handler
+
+
+def make_server(
+    host: str = "127.0.0.1", port: int = 8000, **service_kwargs
+) -> ThreadingHTTPServer:
+    service = RenderService(**service_kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.service = service
+    return server
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m upmark.serve", description="Serve upmark rendering over HTTP."
+    )
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8000)
+    arg_parser.add_argument(
+        "--workers", type=int, default=0, help="parser processes (0: parse in-thread)"
+    )
+    arg_parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE)
+    arg_parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    args = arg_parser.parse_args(argv)
+    server = make_server(
+        args.host,
+        args.port,
+        workers=args.workers,
+        cache_size=args.cache_size,
+        max_bytes=args.max_bytes,
+    )
+    print(f"serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
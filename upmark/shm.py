@@ -0,0 +1,180 @@
+from array import array
+from concurrent.futures import Executor, wait
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+from . import entity
+from .entity import Content, Entity
+from .parser import Parser
+from .rule import DEFAULT_RULES
+
+KINDS = [
+    entity.Raw,
+    entity.EmEntity,
+    entity.BoldEntity,
+    entity.BoldEmEntity,
+    entity.ParagraphEntity,
+    entity.HeaderEntity,
+    entity.ListItemEntity,
+    entity.OrderedListEntity,
+    entity.UnorderedListEntity,
+    entity.FencedPreEntity,
+    entity.IndentedPreEntity,
+    entity.IndentedPreLineEntity,
+    entity.BlockQuoteEntity,
+    entity.BlockQuoteLineEntity,
+]
+KIND_IDS = {kind: i for i, kind in enumerate(KINDS)}
+COLUMNS = ("kind", "start", "end", "parent", "extra", "aux")
+ITEM_SIZE = array("q").itemsize
+
+_parser = Parser(DEFAULT_RULES)
+
+
+class ShmResult(NamedTuple):
+    name: str
+    count: int
+    strings: [str]
+
+
+def _children(el: Entity) -> [Entity]:
+    children = getattr(el, "content", None)
+    if isinstance(children, Content):
+        return children.content
+    if isinstance(children, list):
+        return children
+    return []
+
+
+def encode(content: Content) -> (array, [str]):
+    rows = []
+    strings = []
+    stack = [(el, -1) for el in reversed(content.content)]
+    while stack:
+        el, parent = stack.pop()
+        kind = KIND_IDS.get(type(el))
+        if kind is None:
+            raise TypeError(f"can't encode {type(el).__name__}")
+        extra = aux = 0
+        if isinstance(el, entity.HeaderEntity):
+            extra = el.level
+            aux = int(el.is_bof)
+        elif isinstance(el, entity.FencedPreEntity):
+            # the body ends just before the closing fence and its newline
+            extra = el.end - 4 - len(el.content)
+            aux = -1 if el.lang is None else len(strings)
+            if el.lang is not None:
+                strings.append(el.lang)
+        node = len(rows)
+        rows.append((kind, el.start, el.end, parent, extra, aux))
+        stack.extend((child, node) for child in reversed(_children(el)))
+    cols = array("q")
+    for col in range(len(COLUMNS)):
+        cols.extend(row[col] for row in rows)
+    return cols, strings
+
+
+def _build(kind: type, text: str, row, children: [Entity], strings: [str]) -> Entity:
+    _, start, end, _, extra, aux = row
+    if kind is entity.Raw or kind is entity.IndentedPreLineEntity:
+        return kind(text, start, end)
+    if kind is entity.HeaderEntity:
+        return kind(
+            text, start, end, Content(children), level=extra, is_bof=bool(aux)
+        )
+    if kind is entity.FencedPreEntity:
+        lang = None if aux < 0 else strings[aux]
+        return kind(text, start, end, lang, text[extra : end - 4])
+    if kind is entity.BlockQuoteLineEntity:
+        # its __init__ re-adjusts start, which has already been done
+        el = kind.__new__(kind)
+        Entity.__init__(el, text, start, end)
+        return el
+    if issubclass(kind, (entity.WrappingEntity, entity.BoldEmEntity)):
+        return kind(text, start, end, Content(children))
+    return kind(text, start, end, children)
+
+
+def decode(cols: array | memoryview, count: int, strings: [str], text: str) -> Content:
+    rows = [
+        tuple(cols[col * count + i] for col in range(len(COLUMNS))) for i in range(count)
+    ]
+    children = [[] for _ in range(count)]
+    top = []
+    # rows are in pre-order, so every child comes after its parent
+    for i in range(count - 1, -1, -1):
+        row = rows[i]
+        el = _build(KINDS[row[0]], text, row, children[i][::-1], strings)
+        parent = row[3]
+        (top if parent < 0 else children[parent]).append(el)
+    return Content(top[::-1])
+
+
+def parse_to_shm(text: str) -> ShmResult:
+    cols, strings = encode(_parser.parse(text))
+    count = len(cols) // len(COLUMNS)
+    shm = shared_memory.SharedMemory(create=True, size=max(len(cols) * ITEM_SIZE, 1))
+    try:
+        shm.buf[: len(cols) * ITEM_SIZE] = cols.tobytes()
+        return ShmResult(shm.name, count, strings)
+    finally:
+        shm.close()
+
+
+class ContentView:
+    cols: array
+    count: int
+    strings: [str]
+    text: str
+
+    def __init__(self, cols, count, strings, text):
+        self.cols = cols
+        self.count = count
+        self.strings = strings
+        self.text = text
+
+    @classmethod
+    def attach(cls, result: ShmResult, text: str) -> "ContentView":
+        shm = shared_memory.SharedMemory(name=result.name)
+        try:
+            cols = array("q")
+            cols.frombytes(shm.buf[: result.count * len(COLUMNS) * ITEM_SIZE])
+        finally:
+            shm.close()
+            shm.unlink()
+        return cls(cols, result.count, result.strings, text)
+
+    def column(self, name: str) -> memoryview:
+        col = COLUMNS.index(name)
+        return memoryview(self.cols)[col * self.count : (col + 1) * self.count]
+
+    def to_content(self) -> Content:
+        return decode(self.cols, self.count, self.strings, self.text)
+
+    def to_string(self) -> str:
+        return self.to_content().to_string()
+
+
+def _unlink(name: str):
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def parse_in_pool(pool: Executor, texts: [str]) -> [ContentView]:
+    # every segment a worker created has to be unlinked here, including
+    # those after a failed text or attach
+    futures = [pool.submit(parse_to_shm, text) for text in texts]
+    wait(futures)
+    views = []
+    try:
+        for future, text in zip(futures, texts):
+            views.append(ContentView.attach(future.result(), text))
+    finally:
+        for future in futures[len(views) :]:
+            if not future.cancelled() and future.exception() is None:
+                _unlink(future.result().name)
+    return views
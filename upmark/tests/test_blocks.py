@@ -0,0 +1,81 @@
+import random
+from unittest import TestCase
+from upmark import fuzz
+from upmark.parser import Parser
+from upmark.rule import DEFAULT_RULES
+
+TEST_TEXT = (
+    "# header\n\n\nsome _text_\n\n\n\n* one\n* two\n\n\n"
+    "```\nfenced\n\n\n\nstill fenced\n```\n\n\n#\n\n\nheader\n\n\nlast"
+)
+
+
+class TestRenderRange(TestCase):
+    def test_blocks_concatenate_to_full_render(self):
+        parser = Parser(DEFAULT_RULES)
+        index = parser.get_block_index(TEST_TEXT)
+        blocks = [parser.render_range(TEST_TEXT, i, 1) for i in range(len(index))]
+        self.assertEqual(parser.parse(TEST_TEXT).to_string(), "".join(blocks))
+        self.assertEqual("".join(blocks[1:3]), parser.render_range(TEST_TEXT, 1, 2))
+
+    def test_cuts_skip_crossing_matches(self):
+        parser = Parser(DEFAULT_RULES)
+        index = parser.get_block_index(TEST_TEXT)
+        fence_start = TEST_TEXT.index("```")
+        fence_end = TEST_TEXT.index("```", fence_start + 3)
+        hash_line = TEST_TEXT.index("\n#\n")
+        for cut in index.bounds:
+            self.assertFalse(fence_start < cut < fence_end)
+            self.assertFalse(hash_line < cut < TEST_TEXT.index("header\n\n\nlast"))
+
+    def test_index_reused(self):
+        parser = Parser(DEFAULT_RULES)
+        parser.render_range(TEST_TEXT, 0, 1)
+        index = parser.block_index
+        parser.render_range(TEST_TEXT, 1, 1)
+        self.assertIs(index, parser.block_index)
+        # only the requested blocks and their neighbours get parsed
+        self.assertEqual({0, 1, 2}, set(index.parsed))
+        self.assertLess(3, len(index))
+
+    def test_render_offsets(self):
+        parser = Parser(DEFAULT_RULES)
+        index = parser.get_block_index(TEST_TEXT)
+        offset = TEST_TEXT.index("some")
+        self.assertEqual(
+            index.render_range(index.block_at(offset), 1),
+            index.render_offsets(offset, offset + 4),
+        )
+
+    def test_whitespace_at_cuts(self):
+        parser = Parser(DEFAULT_RULES)
+        for text in (
+            "\n\n3. 2\n\n\n\t\t\n",
+            "#e\n\n     \n",
+            "\n\n     \n",
+            "x\n\n- ul 2\n\n\n>> nested",
+            "- one\n\n\n\n- two\n\n\nthree",
+        ):
+            index = parser.get_block_index(text)
+            self.assertEqual(
+                parser.parse(text).to_string(),
+                parser.render_range(text, 0, len(index)),
+            )
+
+    def test_mutated_corpus_matches_full_render(self):
+        rng = random.Random(0)
+        seeds = fuzz.seeds(regressions=False)
+        for _ in range(300):
+            lines = fuzz.mutate(rng, rng.choice(seeds)).split("\n")
+            for _ in range(rng.randrange(1, 8)):
+                blank = rng.choice(["", " ", "\t\t"])
+                lines.insert(rng.randrange(len(lines) + 1), blank)
+            text = "\n".join(lines)
+            parser = Parser(DEFAULT_RULES)
+            try:
+                full = parser.parse(text).to_string()
+            except IndexError:
+                # an empty quote line at the end crashes either way
+                continue
+            index = parser.get_block_index(text)
+            self.assertEqual(full, parser.render_range(text, 0, len(index)), text)
@@ -0,0 +1,72 @@
+import io
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest import TestCase
+from upmark import build
+
+
+class TestBuild(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = Path(self.tmp.name) / "src"
+        self.out = Path(self.tmp.name) / "out"
+        (self.src / "sub").mkdir(parents=True)
+        (self.src / "index.md").write_text("# header\n\nsome _text_\n")
+        (self.src / "sub" / "page.md").write_text("\n\n* one\n* two\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build(self):
+        stats = build.build(self.src, self.out, jobs=1)
+        self.assertEqual(2, stats["converted"])
+        self.assertEqual(0, stats["skipped"])
+        self.assertEqual(
+            "<h1>header</h1>\n\n\nsome <em>text</em>",
+            (self.out / "index.html").read_text(),
+        )
+        self.assertTrue((self.out / "sub" / "page.html").exists())
+
+    def test_rebuild_skips_unchanged(self):
+        build.build(self.src, self.out, jobs=1)
+        (self.src / "index.md").write_text("# changed\n")
+        stats = build.build(self.src, self.out, jobs=1)
+        self.assertEqual(1, stats["converted"])
+        self.assertEqual(1, stats["skipped"])
+        self.assertEqual("<h1>changed</h1>\n", (self.out / "index.html").read_text())
+
+    def test_force(self):
+        build.build(self.src, self.out, jobs=1)
+        stats = build.build(self.src, self.out, jobs=1, force=True)
+        self.assertEqual(2, stats["converted"])
+
+    def test_fingerprint_covers_renderer(self):
+        sources = Path(self.tmp.name) / "pkg"
+        sources.mkdir()
+        (sources / "entity.py").write_text("def to_string(): return ''\n")
+        before = build.config_fingerprint(build.DEFAULT_RULES, sources)
+        (sources / "entity.py").write_text("def to_string(): return escape('')\n")
+        after = build.config_fingerprint(build.DEFAULT_RULES, sources)
+        self.assertNotEqual(before, after)
+
+    def test_bad_file(self):
+        (self.src / "bad.md").write_bytes(b"# \xff\xfe\n")
+        stats = build.build(self.src, self.out, jobs=1)
+        self.assertEqual(["bad.md"], list(stats["errors"]))
+        self.assertEqual(2, stats["converted"])
+        self.assertFalse((self.out / "bad.html").exists())
+        stats = build.build(self.src, self.out, jobs=1)
+        self.assertEqual(2, stats["skipped"])
+        self.assertEqual(["bad.md"], list(stats["errors"]))
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()) as err:
+            self.assertEqual(1, build.main([str(self.src), str(self.out)]))
+        self.assertIn("bad.md: UnicodeDecodeError", err.getvalue())
+
+    def test_removes_deleted(self):
+        build.build(self.src, self.out, jobs=1)
+        (self.src / "sub" / "page.md").unlink()
+        stats = build.build(self.src, self.out, jobs=1)
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse((self.out / "sub" / "page.html").exists())
+        self.assertTrue((self.out / "index.html").exists())
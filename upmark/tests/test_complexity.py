@@ -0,0 +1,31 @@
+from unittest import TestCase
+from upmark import complexity, rule
+
+
+class TestFitExponent(TestCase):
+    def test_linear(self):
+        sizes = [100, 200, 400, 800]
+        times = [s * 0.001 for s in sizes]
+        self.assertAlmostEqual(1.0, complexity.fit_exponent(sizes, times))
+
+    def test_quadratic(self):
+        sizes = [100, 200, 400, 800]
+        times = [s * s * 0.001 for s in sizes]
+        self.assertAlmostEqual(2.0, complexity.fit_exponent(sizes, times))
+
+
+class TestAnalyze(TestCase):
+    def test_generators_grow(self):
+        for generators in complexity.GENERATORS.values():
+            for generate in generators.values():
+                self.assertLess(len(generate(10)), len(generate(20)))
+
+    def test_result_shape(self):
+        results = complexity.analyze([rule.HashHeaderRule], counts=[5, 10], min_time=0)
+        self.assertEqual(
+            list(complexity.GENERATORS[rule.HashHeaderRule]),
+            [res["case"] for res in results],
+        )
+        self.assertEqual("HashHeaderRule", results[0]["rule"])
+        self.assertEqual(2, len(results[0]["times"]))
+        self.assertIn("HashHeaderRule", complexity.format_table(results))
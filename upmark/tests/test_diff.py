@@ -0,0 +1,29 @@
+from unittest import TestCase
+from upmark.diff import Patch, apply_patches, diff
+from upmark.parser import Parser
+from upmark.rule import DEFAULT_RULES
+
+OLD_TEXT = "# one\n\nsome _text_\n\n## two\n\n* a\n* b\n"
+
+
+class TestDiff(TestCase):
+    parser = Parser(DEFAULT_RULES)
+
+    def check(self, old_text, new_text):
+        old = self.parser.parse(old_text)
+        new = self.parser.parse(new_text)
+        patches = diff(old, new)
+        blocks = [el.to_string() for el in old.content]
+        self.assertEqual(new.to_string(), "".join(apply_patches(blocks, patches)))
+        return patches
+
+    def test_unchanged(self):
+        self.assertEqual([], self.check(OLD_TEXT, OLD_TEXT))
+
+    def test_replace(self):
+        patches = self.check(OLD_TEXT, OLD_TEXT.replace("## two", "## three"))
+        self.assertEqual([Patch("replace", 3, 4, ["\n<h2>three</h2>\n"])], patches)
+
+    def test_insert_and_delete(self):
+        self.check(OLD_TEXT, "# zero\n\n" + OLD_TEXT)
+        self.check(OLD_TEXT, OLD_TEXT.replace("some _text_\n\n", ""))
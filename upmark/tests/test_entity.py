@@ -1,5 +1,13 @@
 from unittest import TestCase
-from upmark.entity import Content, EmEntity, HeaderEntity, ParagraphEntity, Raw
+from upmark.entity import (
+    Content,
+    EmEntity,
+    FencedPreEntity,
+    HeaderEntity,
+    ParagraphEntity,
+    Raw,
+    escape,
+)
 
 
 class TestRaw(TestCase):
@@ -55,3 +63,27 @@ class TestHeaderEntity(TestCase):
         actual = HeaderEntity(test_text, 0, 19, content, level=2, is_bof=True)
         expected_str = "<h2>this is a header</h2>\n"
         self.assertEqual(expected_str, actual.to_string())
+
+
+class TestEscape(TestCase):
+    def test_escape(self):
+        self.assertEqual("a &lt;b&gt; &amp; &quot;c&quot;", escape('a <b> & "c"'))
+
+    def test_no_escape_needed(self):
+        s = "nothing to escape here"
+        self.assertIs(s, escape(s))
+
+    def test_raw(self):
+        test_text = "if a < b && c"
+        self.assertEqual("if a &lt; b &amp;&amp; c", Raw.from_str(test_text).to_string())
+
+    def test_wrapping_escapes_content_once(self):
+        test_text = "_a <tag>_"
+        content = Content([Raw(test_text, 1, 8)])
+        actual = EmEntity(test_text, 0, 9, content)
+        self.assertEqual("<em>a &lt;tag&gt;</em>", actual.to_string())
+
+    def test_fenced_pre(self):
+        test_text = "\n```\nx < y\n```\n"
+        actual = FencedPreEntity(test_text, 0, 15, None, "x < y\n")
+        self.assertEqual("<pre>x &lt; y\n</pre>", actual.to_string())
@@ -0,0 +1,58 @@
+import math
+import random
+from unittest import TestCase
+from upmark import fuzz
+
+
+class TestSlowInputs(TestCase):
+    def test_replay(self):
+        paths = sorted(fuzz.REGRESSION_DIR.glob("*.md"))
+        if not paths:
+            return
+        baseline = fuzz.per_byte_baseline(fuzz.seeds(regressions=False))
+        for path in paths:
+            with self.subTest(path=path.name):
+                text = path.read_text()
+                seconds = fuzz.parse_time(text, repeat=3)
+                self.assertFalse(fuzz.is_slow(seconds, len(text), baseline))
+
+
+class TestMutate(TestCase):
+    def test_mutations(self):
+        rng = random.Random(0)
+        text = "# header\n\nsome _text_\n"
+        for mutation in fuzz.MUTATIONS:
+            with self.subTest(mutation=mutation.__name__):
+                self.assertIsInstance(mutation(rng, text), str)
+
+    def test_minimize(self):
+        text = "a\nb\nslow\nc\nd"
+        self.assertEqual("slow", fuzz.minimize(text, lambda t: "slow" in t))
+
+    def test_long_runs(self):
+        rng = random.Random(0)
+        text = "para\n\n1. item\n"
+        longest = max(
+            len(max(fuzz.deep_indent(rng, text).split("\n"), key=len))
+            for _ in range(50)
+        )
+        self.assertGreater(longest, 1000)
+        self.assertEqual("para\n\n1. item", fuzz.drop_final_newline(rng, text))
+
+    def test_is_slow(self):
+        baseline = 1e-7
+        self.assertTrue(fuzz.is_slow(1.0, 1000, baseline))
+        self.assertFalse(fuzz.is_slow(1.0, 10_000_000, baseline))
+        self.assertFalse(fuzz.is_slow(0.0001, 1, baseline))
+        self.assertTrue(fuzz.is_slow(math.inf, 10_000_000, baseline))
+        # the same timing is slow or not depending on the machine's baseline
+        self.assertTrue(fuzz.is_slow(0.02, 10_000, baseline))
+        self.assertFalse(fuzz.is_slow(0.02, 10_000, baseline * 100))
+
+    def test_per_byte_baseline(self):
+        self.assertGreater(fuzz.per_byte_baseline(["# header\n", "some _text_\n"]), 0)
+
+    def test_timeout_is_slow(self):
+        text = "some _text_\n" * 200_000
+        with fuzz.Runner(budget=1e-4) as runner:
+            self.assertEqual(math.inf, runner.time(text))
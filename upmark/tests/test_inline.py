@@ -0,0 +1,35 @@
+from unittest import TestCase
+from upmark import render_inline, render_inline_many
+from upmark.parser import Parser
+from upmark.rule import INLINE_RULES
+
+
+class TestRenderInline(TestCase):
+    strings = [
+        "plain title",
+        "this is *really* important",
+        "__bold__ and _em_",
+        "***all of it***",
+        "snake_case_name",
+        "*unclosed",
+        "  _spaced_  ",
+    ]
+
+    def test_plain_unchanged(self):
+        s = "plain title"
+        self.assertIs(s, render_inline(s))
+
+    def test_same_as_parser(self):
+        parser = Parser(INLINE_RULES)
+        for s in self.strings:
+            with self.subTest(s=s):
+                self.assertEqual(parser.parse(s).to_string(), render_inline(s))
+
+    def test_many(self):
+        self.assertEqual(
+            [render_inline(s) for s in self.strings], render_inline_many(self.strings)
+        )
+
+    def test_escapes(self):
+        self.assertEqual("a &lt; b", render_inline("a < b"))
+        self.assertEqual("<em>a &amp; b</em>", render_inline("_a & b_"))
@@ -0,0 +1,63 @@
+from pathlib import Path
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+from upmark import lines
+from upmark.entity import Content
+from upmark.lines import LineTable, clip_windows
+from upmark.parser import Parser
+from upmark.rule import DEFAULT_RULES
+
+TEST_TEXT = (
+    "# header\n\nsome text\n===\n\n* one\n* two\n\t- in one\n\n"
+    "> quoted\n>\n> more\n\n    pre\n    formatted\n\n1. first\n2. second\n"
+)
+
+
+class TestLineTable(TestCase):
+    def check_table(self, table):
+        self.assertEqual([0, 9, 10, 20], [int(s) for s in table.starts[:4]])
+        self.assertEqual([8, 9, 19, 23], [int(e) for e in table.ends[:4]])
+        self.assertEqual(lines.HASH, table.flags[0])
+        self.assertEqual(0, table.flags[1])
+        self.assertEqual(lines.EQ, table.flags[3])
+        self.assertEqual([(23, 47), (65, 89)], table.windows(lines.BULLET | lines.INDENT, 1))
+        self.assertEqual([(46, 66)], table.windows(lines.QUOTE, 1))
+        self.assertAlmostEqual(1 / 19, table.candidate_fraction(lines.HASH))
+
+    def test_python(self):
+        self.check_table(LineTable.from_str(TEST_TEXT, use_numpy=False))
+
+    @skipIf(lines.np is None, "numpy is not installed")
+    def test_numpy(self):
+        self.check_table(LineTable.from_str(TEST_TEXT, use_numpy=True))
+
+    def test_clip_windows(self):
+        windows = [(0, 5), (10, 20), (30, 40)]
+        self.assertEqual([(12, 20), (30, 35)], clip_windows(windows, 12, 35))
+        self.assertEqual([], clip_windows(windows, 20, 30))
+        self.assertEqual([(30, 35)], clip_windows(windows, 12, 35, lo=2))
+
+
+class TestClassifyLines(TestCase):
+    def test_same_as_full_scan(self):
+        test_md = Path(__file__).parents[2] / "test.md"
+        texts = [TEST_TEXT, test_md.read_text()]
+        parser = Parser(DEFAULT_RULES)
+        use_numpy = [False] if lines.np is None else [False, True]
+        for text in texts:
+            expected = parser.parse(text)
+            for numpy in use_numpy:
+                actual = parser.apply_rules(
+                    text,
+                    Content.raw_from_str(text),
+                    LineTable.from_str(text, use_numpy=numpy),
+                )
+                self.assertEqual(
+                    [(type(el), el.start, el.end) for el in expected.content],
+                    [(type(el), el.start, el.end) for el in actual.content],
+                )
+                self.assertEqual(expected.to_string(), actual.to_string())
+
+    def test_full_scan_without_numpy(self):
+        with patch.object(lines, "np", None):
+            self.assertFalse(Parser(DEFAULT_RULES, classify_lines=True).classify_lines)
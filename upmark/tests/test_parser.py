@@ -1,6 +1,12 @@
 from unittest import TestCase
-from upmark.entity import Content, HeaderEntity, Raw
-from upmark.rule import HashHeaderRule, EqH1Rule, EqH2Rule
+from upmark.entity import (
+    Content,
+    FencedPreEntity,
+    HeaderEntity,
+    ListItemEntity,
+    Raw,
+)
+from upmark.rule import DEFAULT_RULES, HashHeaderRule, EqH1Rule, EqH2Rule
 from upmark.parser import Parser
 
 
@@ -71,3 +77,40 @@ class TestParser(TestCase):
         parser = Parser([HashHeaderRule, EqH1Rule, EqH2Rule])
         actual_content = parser.parse(test_text)
         self.assertEqual(expected_content, actual_content)
+
+
+class TestParserIndex(TestCase):
+    test_text = "# one\n\n```python\ncode\n```\n\n## two\n\nsome _text_\n\nthree\n===\n"
+
+    def test_find_all(self):
+        parser = Parser(DEFAULT_RULES, index=True)
+        content = parser.parse(self.test_text)
+        headers = content.find_all(HeaderEntity)
+        self.assertEqual([0, 26, 47], [h.start for h in headers])
+        pres = content.find_all(FencedPreEntity)
+        self.assertEqual(["python"], [p.lang for p in pres])
+
+    def test_outline(self):
+        expected = [(1, "one"), (2, "two"), (1, "three")]
+        indexed = Parser(DEFAULT_RULES, index=True).parse(self.test_text)
+        unindexed = Parser(DEFAULT_RULES).parse(self.test_text)
+        self.assertIsNotNone(indexed.index)
+        self.assertIsNone(unindexed.index)
+        self.assertEqual(expected, indexed.outline())
+        self.assertEqual(expected, unindexed.outline())
+
+    def test_find_all_matches_tree_walk(self):
+        test_text = (
+            "# one\n\nintro\n\n* one\n* two\n\t- in\n\n> q\n> r\n\n    pre\n\n"
+            "1. **bold** and _em_\n"
+        )
+        indexed = Parser(DEFAULT_RULES, index=True).parse(test_text)
+        unindexed = Parser(DEFAULT_RULES).parse(test_text)
+        kinds = {type(el) for el in unindexed.iter_entities()}
+        for kind in kinds | {cls for k in kinds for cls in k.__mro__[1:-1]}:
+            with self.subTest(kind=kind.__name__):
+                self.assertEqual(
+                    [(el.start, el.end) for el in unindexed.find_all(kind)],
+                    [(el.start, el.end) for el in indexed.find_all(kind)],
+                )
+        self.assertEqual(4, len(indexed.find_all(ListItemEntity)))
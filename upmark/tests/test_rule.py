@@ -1,3 +1,4 @@
+import re
 from unittest import TestCase
 from upmark import entity, rule
 from upmark.entity import Content, Raw
@@ -176,6 +177,13 @@ class TestFencedPreRule(TestCase):
         actual_entity = rule.FencedPreRule.parse_entity(test_text, actual_match)
         self.assertEqual(expected_entity, actual_entity)
 
+    def test_consecutive_blocks(self):
+        test_text = "\n```\nfirst\n```\n\n```\nsecond\n```\n"
+        parsed = rule.FencedPreRule.parse(test_text, 0, len(test_text))
+        self.assertEqual(
+            ["first\n", "second\n"], [el.content for el in parsed if not el.is_raw]
+        )
+
 
 class TestIndentedPreRule(TestCase):
     def test_parse_entity(self):
@@ -211,3 +219,45 @@ class TestEmRule(TestCase):
         actual_match = rule.EmRule.pattern.match(test_text)
         actual_entity = rule.EmRule.parse_entity(test_text, actual_match)
         self.assertEqual(expected_entity, actual_entity)
+
+
+class TestPrecheck(TestCase):
+    def test_triggers(self):
+        test_text = "plain prose with *some* markup"
+        self.assertTrue(rule.EmRule.precheck(test_text, 0, len(test_text)))
+        self.assertFalse(rule.EmRule.precheck(test_text, 0, 17))
+        self.assertFalse(rule.BoldRule.precheck(test_text, 0, len(test_text)))
+        self.assertFalse(rule.FencedPreRule.precheck(test_text, 0, len(test_text)))
+
+    def test_no_triggers(self):
+        class AnyRule(rule.Rule):
+            pattern = re.compile("x")
+
+        self.assertTrue(AnyRule.precheck("plain prose", 0, 11))
+
+    def test_custom_subclasses(self):
+        class StrikeRule(
+            rule.SimpleWrappingRule, delimiter="~~", entity=entity.EmEntity
+        ):
+            pass
+
+        class ArrowListRule(
+            rule.ListLikeRule,
+            list_entity=entity.UnorderedListEntity,
+            item_pat=r"(\n(?P<indent>(\t| {4,}))?->[\t ]+(?P<text>.+))",
+        ):
+            pass
+
+        for custom in (StrikeRule, ArrowListRule):
+            self.assertEqual((), custom.triggers)
+            self.assertEqual(0, custom.line_classes)
+            self.assertTrue(custom.precheck("plain prose", 0, 11))
+        test_text = "a ~~b~~ c"
+        self.assertIsInstance(
+            StrikeRule.parse(test_text, 0, len(test_text))[1], entity.EmEntity
+        )
+        test_text = "\n\n-> one\n-> two\n"
+        self.assertIsInstance(
+            ArrowListRule.parse(test_text, 0, len(test_text))[0],
+            entity.UnorderedListEntity,
+        )
@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from http.client import HTTPConnection
+from unittest import TestCase
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from upmark import serve
+
+
+class TestServe(TestCase):
+    def setUp(self):
+        self.server = serve.make_server(port=0, max_bytes=64)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server.service.close()
+        self.thread.join()
+
+    def post(self, path, data, headers=None):
+        return urlopen(Request(self.base + path, data=data, headers=headers or {}))
+
+    def metrics(self, requests: int) -> dict:
+        # a request is counted after its response is sent, so the client can
+        # get ahead of the server
+        deadline = time.monotonic() + 5
+        while True:
+            metrics = json.load(urlopen(self.base + "/metrics"))
+            count = metrics["latency_seconds"]["count"]
+            if count >= requests or time.monotonic() > deadline:
+                return metrics
+            time.sleep(0.01)
+
+    def test_render(self):
+        with self.post("/render", b"# header") as resp:
+            self.assertEqual(200, resp.status)
+            self.assertEqual(b"<h1>header</h1>\n", resp.read())
+            etag = resp.headers["ETag"]
+        with self.assertRaises(HTTPError) as ctx:
+            self.post("/render", b"# header", {"If-None-Match": etag})
+        self.assertEqual(304, ctx.exception.code)
+        with self.post("/render", b"# header") as resp:
+            self.assertEqual(etag, resp.headers["ETag"])
+        metrics = self.metrics(3)
+        # the 304 is answered from the body's ETag without a cache lookup
+        self.assertEqual(1, metrics["cache_hits"])
+        self.assertEqual(1, metrics["cache_misses"])
+        self.assertEqual(0.5, metrics["cache_hit_rate"])
+        self.assertEqual(3, metrics["latency_seconds"]["count"])
+        self.assertEqual({"render 200": 2, "render 304": 1}, metrics["requests"])
+
+    def test_etag_versioned(self):
+        self.assertNotEqual(
+            serve.etag_for("# header"), serve.etag_for("# header", version="older")
+        )
+
+    def test_batch(self):
+        with self.post("/render/batch", json.dumps(["_a_", "# b"]).encode()) as resp:
+            results = json.load(resp)
+        self.assertEqual(
+            ["<em>a</em>", "<h1>b</h1>\n"], [res["html"] for res in results]
+        )
+
+    def test_too_large(self):
+        with self.assertRaises(HTTPError) as ctx:
+            self.post("/render", b"x" * 65)
+        self.assertEqual(413, ctx.exception.code)
+
+    def raw_post(self, headers, body=b""):
+        conn = HTTPConnection("127.0.0.1", self.server.server_port)
+        try:
+            conn.putrequest("POST", "/render")
+            for name, value in headers.items():
+                conn.putheader(name, value)
+            conn.endheaders()
+            conn.send(body)
+            return conn.getresponse().status
+        finally:
+            conn.close()
+
+    def test_negative_length(self):
+        self.assertEqual(400, self.raw_post({"Content-Length": "-1"}, b"x" * 10000))
+
+    def test_chunked(self):
+        body = b"5\r\nhello\r\n0\r\n\r\n"
+        self.assertEqual(411, self.raw_post({"Transfer-Encoding": "chunked"}, body))
+
+    def test_metrics_by_route(self):
+        for i in range(3):
+            with self.assertRaises(HTTPError):
+                urlopen(f"{self.base}/x?{i}")
+        metrics = self.metrics(3)
+        self.assertEqual({"other 404": 3}, metrics["requests"])
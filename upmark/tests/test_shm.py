@@ -0,0 +1,67 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+from pathlib import Path
+from unittest import TestCase, mock, skipUnless
+from upmark import shm
+from upmark.parser import Parser
+from upmark.rule import DEFAULT_RULES
+
+TEST_TEXT = (
+    "# header\n\nsome _text_ and **more**\n\n```python\ncode\n```\n\n"
+    "* one\n* two\n\t- in one\n\n> quoted\n>\n> more\n\n    pre\n    formatted\n\n"
+)
+
+
+def structure(content):
+    return [
+        (type(el), el.start, el.end, structure(shm.Content(shm._children(el))))
+        for el in content.content
+    ]
+
+
+class TestEncode(TestCase):
+    def test_round_trip(self):
+        test_md = (Path(__file__).parents[2] / "test.md").read_text()
+        parser = Parser(DEFAULT_RULES)
+        for text in (TEST_TEXT, test_md):
+            expected = parser.parse(text)
+            cols, strings = shm.encode(expected)
+            actual = shm.decode(cols, len(cols) // len(shm.COLUMNS), strings, text)
+            self.assertEqual(structure(expected), structure(actual))
+            self.assertEqual(expected.to_string(), actual.to_string())
+
+
+class TestSharedMemory(TestCase):
+    def test_attach(self):
+        view = shm.ContentView.attach(shm.parse_to_shm(TEST_TEXT), TEST_TEXT)
+        self.assertEqual(Parser(DEFAULT_RULES).parse(TEST_TEXT).to_string(), view.to_string())
+        self.assertEqual(shm.KIND_IDS[shm.entity.HeaderEntity], view.column("kind")[0])
+
+    def test_parse_in_pool(self):
+        texts = [TEST_TEXT, "_a_", ""]
+        with ProcessPoolExecutor(2) as pool:
+            views = shm.parse_in_pool(pool, texts)
+        parser = Parser(DEFAULT_RULES)
+        self.assertEqual(
+            [parser.parse(text).to_string() for text in texts],
+            [view.to_string() for view in views],
+        )
+
+    @skipUnless(os.path.isdir("/dev/shm"), "needs /dev/shm")
+    def test_parse_in_pool_failure_unlinks(self):
+        # only this test's segments are checked; other processes share /dev/shm
+        created = []
+
+        def parse_to_shm(text):
+            result = shm_parse_to_shm(text)
+            created.append(result.name)
+            return result
+
+        shm_parse_to_shm = shm.parse_to_shm
+        with mock.patch.object(shm, "parse_to_shm", parse_to_shm):
+            with ThreadPoolExecutor(2) as pool:
+                with self.assertRaises(TypeError):
+                    shm.parse_in_pool(pool, [TEST_TEXT, None, "_a_", TEST_TEXT])
+        self.assertEqual(3, len(created))
+        for name in created:
+            self.assertFalse(os.path.exists(f"/dev/shm/{name.lstrip('/')}"))